@@ -1,14 +1,20 @@
 import os
-import json
+import msgspec
+import time
 import asyncio
-import pandas as pd
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
-from fastapi import FastAPI, WebSocket, Request
+import pyarrow as pa
+import pyarrow.compute as pc
+from collections import deque
+from itertools import takewhile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse
 from influxdb_client_3 import InfluxDBClient3
+from schemas import OvenState, OrderEntry, MetricsBlock
 import logging
 
 # Setup logging
@@ -20,6 +26,71 @@ INFLUXDB_HOST = os.getenv('INFLUXDB_HOST', 'localhost')
 INFLUXDB_TOKEN = os.getenv('INFLUXDB_TOKEN', '')
 INFLUXDB_DATABASE = os.getenv('INFLUXDB_BUCKET', 'pizzeria_data')  # In v3, bucket = database
 UPDATE_INTERVAL = int(os.getenv('DASHBOARD_UPDATE_INTERVAL', '1000')) / 1000
+CLIENT_QUEUE_SIZE = int(os.getenv('DASHBOARD_CLIENT_QUEUE_SIZE', '8'))
+CLIENT_SEND_TIMEOUT = float(os.getenv('DASHBOARD_CLIENT_SEND_TIMEOUT', '10'))
+
+# Shared encoder/decoder for WebSocket payloads
+json_encoder = msgspec.json.Encoder()
+json_decoder = msgspec.json.Decoder()
+
+# Keep the Flight (gRPC) channel to InfluxDB alive between ticks so queries
+# reuse the established connection instead of reconnecting
+FLIGHT_KEEPALIVE_OPTIONS = [
+    ("grpc.keepalive_time_ms", 30000),
+    ("grpc.keepalive_timeout_ms", 10000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+]
+
+# Dashboard series: query template, look-back window, number of rows kept and columns used.
+# All series are fetched together in one UNION ALL query per tick.
+OVEN_QUERY = """
+SELECT *
+FROM pizzeria_event
+WHERE {time_filter}
+AND equipment_type = 'pizza_oven'
+AND event_type = 'temperature_reading'
+ORDER BY time DESC
+LIMIT 10
+"""
+
+ORDERS_QUERY = """
+SELECT *
+FROM pizzeria_event
+WHERE {time_filter}
+AND equipment_type = 'order_manager'
+AND (event_type = 'order_created' OR event_type = 'order_status_update')
+ORDER BY time DESC
+LIMIT 20
+"""
+
+METRICS_QUERY = """
+SELECT *
+FROM pizzeria_event
+WHERE {time_filter}
+AND equipment_type = 'order_manager'
+AND event_type = 'metrics_update'
+ORDER BY time DESC
+LIMIT 1
+"""
+
+# Telegraf stamps rows at second precision and flushes every 2s, so rows can land after newer
+# ones were already read. Delta queries re-read this far back and drop the rows already buffered.
+DELTA_OVERLAP = timedelta(seconds=2)
+# Columns Telegraf writes as tags; together with time they identify a row
+TAG_COLUMNS = ("equipment_id", "equipment_type", "location", "event_type", "pizza_type", "order_id", "status", "size")
+
+DASHBOARD_SERIES = {
+    "oven": (OVEN_QUERY, timedelta(minutes=5), 10, [
+        "time", "equipment_id", "temperature", "capacity_used", "capacity_total", "efficiency_score"
+    ]),
+    "orders": (ORDERS_QUERY, timedelta(minutes=30), 20, [
+        "time", "order_id", "pizza_type", "size", "status", "event_type", "duration"
+    ]),
+    "metrics": (METRICS_QUERY, timedelta(hours=1), 1, [
+        "time", "active_orders", "completed_orders", "avg_completion_time", "current_hour_rush"
+    ]),
+}
 
 # FastAPI app
 app = FastAPI(title="Papa Giuseppe's Pizzeria Dashboard")
@@ -28,7 +99,12 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 
 class DashboardData:
     def __init__(self):
-        self.connected_clients: List[WebSocket] = []
+        self.connected_clients: Set[WebSocket] = set()
+        self._client_queues: Dict[WebSocket, asyncio.Queue] = {}
+        self._client_writers: Dict[WebSocket, asyncio.Task] = {}
+        self._needs_snapshot: Set[WebSocket] = set()
+        self.shutting_down = asyncio.Event()
+        self._last_sections: Dict[bytes, bytes] = {}
         self.simulation_controls = {
             "rush_mode": False,
             "equipment_failure": False,
@@ -36,6 +112,18 @@ class DashboardData:
             "speed_multiplier": 1.0
         }
         self.influxdb_client = None
+        # Flight queries are blocking, so they run on a thread off the event loop
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="influxdb-query")
+        self._cache: Tuple[float, Optional[Dict]] = (0.0, None)
+        self._cache_lock = asyncio.Lock()
+        self._last_ts: Dict[str, Optional[datetime]] = {name: None for name in DASHBOARD_SERIES}
+        self._rows: Dict[str, deque] = {
+            name: deque(maxlen=limit) for name, (_, _, limit, _) in DASHBOARD_SERIES.items()
+        }
+        # Output objects reused between ticks instead of being rebuilt
+        self._oven_slots: Dict[str, OvenState] = {}
+        self._order_slots: List[OrderEntry] = []
+        self._metrics = MetricsBlock()
         self._init_influxdb_client()
     
     def _init_influxdb_client(self):
@@ -47,36 +135,244 @@ class DashboardData:
           self.influxdb_client = InfluxDBClient3(
               host=f"http://{INFLUXDB_HOST}:8181",
               token=INFLUXDB_TOKEN,
-              database=INFLUXDB_DATABASE
+              database=INFLUXDB_DATABASE,
+              flight_client_options={"generic_options": FLIGHT_KEEPALIVE_OPTIONS}
           )
           logger.info("InfluxDB v3 client initialized successfully")
       except Exception as e:
           logger.error(f"Failed to initialize InfluxDB client: {e}")
           self.influxdb_client = None
     
-    async def add_client(self, websocket: WebSocket):
-        self.connected_clients.append(websocket)
+    def _time_filter(self, name: str) -> str:
+        """Cover the whole window on the first query, afterwards only rows from just before the last seen"""
+        _, window, _, _ = DASHBOARD_SERIES[name]
+        cutoff = utc_now() - window
+        last_ts = self._last_ts[name]
+        if last_ts is not None:
+            # Never read past the window, even if the last row seen is older (e.g. after an idle gap)
+            cutoff = max(cutoff, last_ts - DELTA_OVERLAP)
+        # Literal timestamps (rather than now() - interval) let InfluxDB prune files by time
+        return f"time >= '{cutoff.isoformat()}'"
+    
+    def _series_query(self) -> str:
+        """Build the query fetching every series, tagged with a source column to split the result"""
+        return "\nUNION ALL\n".join(
+            f"SELECT *, '{name}' AS source FROM ({series_query.format(time_filter=self._time_filter(name))})"
+            for name, (series_query, _, _, _) in DASHBOARD_SERIES.items()
+        )
+    
+    def explain_series_query(self):
+        """Log the query plan once so time pruning and limit push-down can be checked"""
+        try:
+            result = self.influxdb_client.query(query=f"EXPLAIN {self._series_query()}", language="sql")
+            for row in result.to_pylist():
+                logger.info(f"Dashboard query plan ({row.get('plan_type')}):\n{row.get('plan')}")
+        except Exception as e:
+            logger.warning(f"Could not explain dashboard query: {e}")
+    
+    def query_series(self) -> Dict[str, List[Dict]]:
+        """Fetch new rows for every series in a single query and merge them into the series buffers"""
+        result = self.influxdb_client.query(query=self._series_query(), language="sql")
+        
+        series = {}
+        for name, (_, window, _, columns) in DASHBOARD_SERIES.items():
+            rows = table_to_rows(result.filter(pc.equal(result["source"], name)), columns) if result else []
+            
+            buffer = self._rows[name]
+            last_ts = self._last_ts[name]
+            if last_ts is not None:
+                # The delta query overlaps rows already buffered; keep only the ones not seen yet
+                overlap_start = last_ts - DELTA_OVERLAP
+                seen = {row_key(row) for row in takewhile(lambda row: row["time"] >= overlap_start, buffer)}
+                rows = [row for row in rows if row_key(row) not in seen]
+            
+            if rows:
+                # Keep the buffer newest first; late rows can be older than rows already buffered
+                merged = sorted([*rows, *buffer], key=lambda row: row["time"], reverse=True)
+                buffer.clear()
+                buffer.extend(merged[:buffer.maxlen])
+            if buffer:
+                self._last_ts[name] = buffer[0]["time"]
+            
+            cutoff = utc_now() - window
+            while buffer and buffer[-1]["time"] < cutoff:
+                buffer.pop()
+            series[name] = list(buffer)
+        return series
+    
+    async def fetch_series(self) -> Dict[str, List[Dict]]:
+        """Run query_series on the query thread, returning no rows if the query fails"""
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._executor, self.query_series)
+        except Exception as e:
+            logger.warning(f"Dashboard query failed: {e}")
+            return {name: [] for name in DASHBOARD_SERIES}
+    
+    async def get_data(self) -> Dict:
+        """Return dashboard data, sharing a single InfluxDB round-trip between callers within a tick"""
+        data = self.cached_data()
+        if data is not None:
+            return data
+        
+        async with self._cache_lock:
+            # Another caller may have refreshed the cache while we waited for the lock
+            data = self.cached_data()
+            if data is None:
+                data = await self.query_data()
+                self.store_data(data)
+            return data
+    
+    async def query_data(self) -> Dict:
+        """Query InfluxDB v3 and return dashboard data"""
+        try:
+            if not self.influxdb_client:
+                return {"error": "InfluxDB client not available", "status": "error"}
+            
+            # Execute query
+            series = await self.fetch_series()
+            
+            # Process results
+            dashboard_data = {
+                "timestamp": utc_isoformat(utc_now()),
+                "ovens": process_oven_data(series["oven"], self._oven_slots),
+                "recent_orders": process_orders_data(series["orders"], self._order_slots),
+                "metrics": process_metrics_data(series["metrics"], self._metrics),
+                "simulation_controls": self.simulation_controls.copy(),
+                "status": "connected"
+            }
+            
+            return dashboard_data
+            
+        except Exception as e:
+            logger.error(f"Error querying dashboard data: {e}")
+            return {
+                "timestamp": utc_isoformat(utc_now()),
+                "error": str(e),
+                "status": "error"
+            }
+    
+    async def log_query_plan(self):
+        """Explain the series query on the query thread"""
+        if self.influxdb_client:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self.explain_series_query)
+    
+    def close(self):
+        """Close the InfluxDB client and stop the query thread"""
+        if self.influxdb_client:
+            self.influxdb_client.close()
+        self._executor.shutdown(wait=False)
+    
+    def cached_data(self) -> Optional[Dict]:
+        """Return the last dashboard data if it is still fresh for this tick"""
+        cached_at, data = self._cache
+        if data is not None and time.monotonic() - cached_at < UPDATE_INTERVAL / 2:
+            return data
+        return None
+    
+    def store_data(self, data: Dict):
+        self._cache = (time.monotonic(), data)
+    
+    def invalidate_cache(self):
+        self._cache = (0.0, None)
+    
+    async def add_client(self, websocket: WebSocket) -> asyncio.Task:
+        """Register a client and return its writer task, which finishes if the client is dropped"""
+        queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        writer = asyncio.create_task(self._client_writer(websocket, queue))
+        self._client_queues[websocket] = queue
+        self._client_writers[websocket] = writer
+        self.connected_clients.add(websocket)
         logger.info(f"Client connected. Total clients: {len(self.connected_clients)}")
+        return writer
     
     async def remove_client(self, websocket: WebSocket):
-        if websocket in self.connected_clients:
-            self.connected_clients.remove(websocket)
+        if websocket not in self.connected_clients:
+            return
+        self.connected_clients.discard(websocket)
+        self._needs_snapshot.discard(websocket)
+        self._client_queues.pop(websocket, None)
+        writer = self._client_writers.pop(websocket, None)
+        if writer and writer is not asyncio.current_task():
+            writer.cancel()
         logger.info(f"Client disconnected. Total clients: {len(self.connected_clients)}")
     
+    def send_snapshot(self, websocket: WebSocket, data: Dict):
+        """Queue a full snapshot for one client"""
+        queue = self._client_queues.get(websocket)
+        if queue is not None:
+            payload = json_encoder.encode({"type": "snapshot", **data})
+            self._enqueue(queue, payload, payload)
+            # Deltas are relative to the last broadcast, which this client never saw
+            self._needs_snapshot.add(websocket)
+    
     async def broadcast_data(self, data: Dict):
         if not self.connected_clients:
             return
+        
+        # Serialize once and share the payloads between all clients
+        snapshot, delta = self._encode_update(data)
+        # Snapshot the queues so clients can disconnect while we enqueue
+        for websocket, queue in list(self._client_queues.items()):
+            if websocket in self._needs_snapshot:
+                self._needs_snapshot.discard(websocket)
+                self._enqueue(queue, snapshot, snapshot)
+            else:
+                self._enqueue(queue, delta, snapshot)
+    
+    def _encode_update(self, data: Dict) -> Tuple[bytes, bytes]:
+        """Encode data as a full snapshot and as a delta of the sections changed since the last broadcast"""
+        sections = {json_encoder.encode(key): json_encoder.encode(value) for key, value in data.items()}
+        changed = {key: value for key, value in sections.items() if self._last_sections.get(key) != value}
+        # Sections that disappeared (e.g. an error that cleared) are reset on the client
+        for key in self._last_sections.keys() - sections.keys():
+            changed[key] = b"null"
+        self._last_sections = sections
+        return self._join_sections(b"snapshot", sections), self._join_sections(b"delta", changed)
+    
+    @staticmethod
+    def _join_sections(update_type: bytes, sections: Dict[bytes, bytes]) -> bytes:
+        return b'{"type":"' + update_type + b'"' + b"".join(b"," + key + b":" + value for key, value in sections.items()) + b"}"
+    
+    @staticmethod
+    def _enqueue(queue: asyncio.Queue, payload: bytes, snapshot: bytes):
+        """Put a payload on a client queue, replacing the backlog with a full snapshot if the client fell behind"""
+        if queue.full():
+            while not queue.empty():
+                queue.get_nowait()
+            payload = snapshot
+        queue.put_nowait(payload)
+    
+    async def _client_writer(self, websocket: WebSocket, queue: asyncio.Queue):
+        """Send queued updates, coalescing any backlog into a single JSON array frame"""
+        while True:
+            payloads = [await queue.get()]
+            while True:
+                try:
+                    payloads.append(queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
             
-        disconnected = []
-        for client in self.connected_clients:
+            frame = payloads[0] if len(payloads) == 1 else b"[" + b",".join(payloads) + b"]"
             try:
-                await client.send_text(json.dumps(data))
+                # A peer that stops reading must not hold its writer forever
+                await asyncio.wait_for(websocket.send_bytes(frame), timeout=CLIENT_SEND_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning(f"Client stopped reading for {CLIENT_SEND_TIMEOUT}s, dropping it")
+                await self._drop_client(websocket)
+                return
             except Exception as e:
                 logger.warning(f"Client disconnected: {e}")
-                disconnected.append(client)
-        
-        for client in disconnected:
-            await self.remove_client(client)
+                await self._drop_client(websocket)
+                return
+    
+    async def _drop_client(self, websocket: WebSocket):
+        """Unregister a client the writer gave up on and close its socket"""
+        await self.remove_client(websocket)
+        try:
+            await asyncio.wait_for(websocket.close(code=1011), timeout=CLIENT_SEND_TIMEOUT)
+        except Exception as e:
+            logger.debug(f"Could not close dropped client: {e}")
 
 # Global dashboard data instance
 dashboard = DashboardData()
@@ -91,18 +387,28 @@ async def get_dashboard(request: Request):
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
-    await dashboard.add_client(websocket)
+    writer_task = await dashboard.add_client(websocket)
     
+    # Wait for client messages, server shutdown or the writer dropping the client without waking up while idle
+    shutdown_task = asyncio.create_task(dashboard.shutting_down.wait())
+    receive_task = None
     try:
-        initial_data = await get_dashboard_data()
-        await websocket.send_text(json.dumps(initial_data))
+        initial_data = await dashboard.get_data()
+        dashboard.send_snapshot(websocket, initial_data)
         
         while True:
+            receive_task = asyncio.create_task(websocket.receive_text())
+            done, _ = await asyncio.wait(
+                {receive_task, shutdown_task, writer_task}, return_when=asyncio.FIRST_COMPLETED
+            )
+            if receive_task not in done:
+                break
+            
             try:
-                message = await asyncio.wait_for(websocket.receive_text(), timeout=1.0)
-                await handle_client_message(json.loads(message))
-            except asyncio.TimeoutError:
-                continue
+                message = receive_task.result()
+                await handle_client_message(json_decoder.decode(message))
+            except WebSocketDisconnect:
+                break
             except Exception as e:
                 logger.error(f"WebSocket error: {e}")
                 break
@@ -110,12 +416,17 @@ async def websocket_endpoint(websocket: WebSocket):
     except Exception as e:
         logger.error(f"WebSocket connection error: {e}")
     finally:
+        if receive_task:
+            receive_task.cancel()
+        shutdown_task.cancel()
         await dashboard.remove_client(websocket)
 
 async def handle_client_message(message: Dict):
     """Handle interactive control messages"""
     if message.get("type") == "control":
         action = message.get("action")
+        # Cached snapshots embed the controls, so drop them on any change
+        dashboard.invalidate_cache()
         
         if action == "toggle_rush_mode":
             dashboard.simulation_controls["rush_mode"] = not dashboard.simulation_controls["rush_mode"]
@@ -134,163 +445,97 @@ async def handle_client_message(message: Dict):
             dashboard.simulation_controls["speed_multiplier"] = max(0.1, min(5.0, speed))
             logger.info(f"Speed multiplier: {dashboard.simulation_controls['speed_multiplier']}")
 
-async def get_dashboard_data() -> Dict:
-    """Query InfluxDB v3 and return dashboard data"""
-    try:
-        if not dashboard.influxdb_client:
-            return {"error": "InfluxDB client not available", "status": "error"}
-        
-        # Query for oven data using v3 SQL syntax
-        oven_query = """
-        SELECT *
-        FROM pizzeria_event
-        WHERE time >= now() - interval '5 minutes'
-        AND equipment_type = 'pizza_oven'
-        AND event_type = 'temperature_reading'
-        ORDER BY time DESC
-        LIMIT 10
-        """
-        
-        # Query for recent orders
-        orders_query = """
-        SELECT *
-        FROM pizzeria_event
-        WHERE time >= now() - interval '30 minutes'
-        AND equipment_type = 'order_manager'
-        AND (event_type = 'order_created' OR event_type = 'order_status_update')
-        ORDER BY time DESC
-        LIMIT 20
-        """
-        
-        # Query for metrics
-        metrics_query = """
-        SELECT *
-        FROM pizzeria_event
-        WHERE time >= now() - interval '1 hour'
-        AND equipment_type = 'order_manager'
-        AND event_type = 'metrics_update'
-        ORDER BY time DESC
-        LIMIT 1
-        """
-        
-        # Execute queries
-        try:
-            oven_result = dashboard.influxdb_client.query(query=oven_query, language="sql")
-            oven_df = oven_result.to_pandas() if oven_result else pd.DataFrame()
-        except Exception:
-            oven_df = pd.DataFrame()
-            
-        try:
-            orders_result = dashboard.influxdb_client.query(query=orders_query, language="sql")
-            orders_df = orders_result.to_pandas() if orders_result else pd.DataFrame()
-        except Exception:
-            orders_df = pd.DataFrame()
-            
-        try:
-            metrics_result = dashboard.influxdb_client.query(query=metrics_query, language="sql")
-            metrics_df = metrics_result.to_pandas() if metrics_result else pd.DataFrame()
-        except Exception:
-            metrics_df = pd.DataFrame()
-        
-        # Process results
-        dashboard_data = {
-            "timestamp": datetime.utcnow().isoformat(),
-            "ovens": process_oven_data(oven_df),
-            "recent_orders": process_orders_data(orders_df),
-            "metrics": process_metrics_data(metrics_df),
-            "simulation_controls": dashboard.simulation_controls.copy(),
-            "status": "connected"
-        }
-        
-        return dashboard_data
-        
-    except Exception as e:
-        logger.error(f"Error querying dashboard data: {e}")
-        return {
-            "timestamp": datetime.utcnow().isoformat(),
-            "error": str(e),
-            "status": "error"
-        }
+def utc_now() -> datetime:
+    """Current UTC time as a naive datetime, matching the timestamps InfluxDB returns"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
 
-def process_oven_data(df: pd.DataFrame) -> List[Dict]:
-    """Process oven data from DataFrame"""
-    if df.empty:
-        return []
+def utc_isoformat(timestamp: datetime) -> str:
+    """Format a UTC timestamp with an explicit offset, so browsers don't read it as local time"""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.isoformat()
+
+def row_key(row: Dict) -> Tuple:
+    """Identify a row by its time and tag set, like InfluxDB does"""
+    return (row["time"], *(row.get(tag) for tag in TAG_COLUMNS))
+
+def table_to_rows(table: pa.Table, columns: List[str]) -> List[Dict]:
+    """Convert only the columns the dashboard uses from an Arrow table to row dicts"""
+    table = table.select([c for c in columns if c in table.column_names])
+    
+    # datetime only has microsecond resolution, so convert InfluxDB's nanosecond timestamps up front
+    time_index = table.schema.get_field_index("time")
+    if time_index >= 0:
+        time_type = pa.timestamp("us", tz=table.schema.field(time_index).type.tz)
+        table = table.set_column(time_index, "time", pc.cast(table["time"], time_type, safe=False))
     
+    return table.to_pylist()
+
+def process_oven_data(rows: List[Dict], slots: Dict[str, OvenState]) -> List[OvenState]:
+    """Process oven data from buffered rows, updating the per-oven states in slots in place"""
     ovens = {}
-    for _, row in df.iterrows():
-        oven_id = row.get("equipment_id", "unknown")
+    for row in rows:
+        oven_id = row.get("equipment_id") or "unknown"
         
-        if oven_id not in ovens:
-            ovens[oven_id] = {
-                "oven_id": oven_id,
-                "temperature": 0,
-                "capacity_used": 0,
-                "capacity_total": 4,
-                "efficiency": 0,
-                "status": "offline"
-            }
+        oven = ovens.get(oven_id)
+        if oven is None:
+            oven = slots.get(oven_id)
+            if oven is None:
+                oven = slots[oven_id] = OvenState(oven_id=oven_id)
+            else:
+                oven.reset()
+            ovens[oven_id] = oven
         
         # Update oven data from row
-        if pd.notna(row.get("temperature")):
-            ovens[oven_id]["temperature"] = round(float(row["temperature"]), 1)
-            ovens[oven_id]["status"] = "active"
-        if pd.notna(row.get("capacity_used")):
-            ovens[oven_id]["capacity_used"] = int(row["capacity_used"])
-        if pd.notna(row.get("capacity_total")):
-            ovens[oven_id]["capacity_total"] = int(row["capacity_total"])
-        if pd.notna(row.get("efficiency_score")):
-            ovens[oven_id]["efficiency"] = round(float(row["efficiency_score"]), 2)
+        if row.get("temperature") is not None:
+            oven.temperature = round(float(row["temperature"]), 1)
+            oven.status = "active"
+        if row.get("capacity_used") is not None:
+            oven.capacity_used = int(row["capacity_used"])
+        if row.get("capacity_total") is not None:
+            oven.capacity_total = int(row["capacity_total"])
+        if row.get("efficiency_score") is not None:
+            oven.efficiency = round(float(row["efficiency_score"]), 2)
     
     return list(ovens.values())
 
-def process_orders_data(df: pd.DataFrame) -> List[Dict]:
-    """Process orders data from DataFrame"""
-    if df.empty:
-        return []
-    
-    orders = []
-    for _, row in df.iterrows():
-        order_data = {
-            "timestamp": row.get("time"),
-            "order_id": row.get("order_id", ""),
-            "pizza_type": row.get("pizza_type", ""),
-            "size": row.get("size", ""),
-            "status": row.get("status", ""),
-            "event_type": row.get("event_type", "")
-        }
+def process_orders_data(rows: List[Dict], slots: List[OrderEntry]) -> List[OrderEntry]:
+    """Process orders data from buffered rows, reusing the order entries in slots"""
+    # Only the newest 10 orders are shown, so don't touch the rest
+    rows = rows[:10]
+    for i, row in enumerate(rows):
+        if i == len(slots):
+            slots.append(OrderEntry())
+        order_data = slots[i]
         
-        if pd.notna(row.get("duration")):
-            order_data["duration"] = int(float(row["duration"]))
-            
-        orders.append(order_data)
+        timestamp = row.get("time")
+        order_data.timestamp = utc_isoformat(timestamp) if timestamp else None
+        order_data.order_id = row.get("order_id") or ""
+        order_data.pizza_type = row.get("pizza_type") or ""
+        order_data.size = row.get("size") or ""
+        order_data.status = row.get("status") or ""
+        order_data.event_type = row.get("event_type") or ""
+        
+        duration = row.get("duration")
+        order_data.duration = int(float(duration)) if duration is not None else None
     
-    return orders[:10]
+    return slots[:len(rows)]
 
-def process_metrics_data(df: pd.DataFrame) -> Dict:
-    """Process metrics data from DataFrame"""
-    metrics = {
-        "active_orders": 0,
-        "completed_orders": 0,
-        "avg_completion_time": 0,
-        "orders_received": 0,
-        "orders_prep": 0,
-        "orders_baking": 0,
-        "orders_ready": 0,
-        "rush_hour": False
-    }
+def process_metrics_data(rows: List[Dict], metrics: MetricsBlock) -> MetricsBlock:
+    """Process metrics data from buffered rows into the reused metrics block"""
+    metrics.reset()
     
-    if not df.empty:
-        row = df.iloc[0]  # Get latest metrics
+    if rows:
+        row = rows[0]  # Get latest metrics
         
-        if pd.notna(row.get("active_orders")):
-            metrics["active_orders"] = int(row["active_orders"])
-        if pd.notna(row.get("completed_orders")):
-            metrics["completed_orders"] = int(row["completed_orders"])
-        if pd.notna(row.get("avg_completion_time")):
-            metrics["avg_completion_time"] = round(float(row["avg_completion_time"]), 1)
-        if pd.notna(row.get("current_hour_rush")):
-            metrics["rush_hour"] = bool(row["current_hour_rush"])
+        if row.get("active_orders") is not None:
+            metrics.active_orders = int(row["active_orders"])
+        if row.get("completed_orders") is not None:
+            metrics.completed_orders = int(row["completed_orders"])
+        if row.get("avg_completion_time") is not None:
+            metrics.avg_completion_time = round(float(row["avg_completion_time"]), 1)
+        if row.get("current_hour_rush") is not None:
+            metrics.rush_hour = bool(row["current_hour_rush"])
     
     return metrics
 
@@ -299,7 +544,7 @@ async def periodic_updates():
     while True:
         try:
             if dashboard.connected_clients:
-                data = await get_dashboard_data()
+                data = await dashboard.get_data()
                 await dashboard.broadcast_data(data)
             await asyncio.sleep(UPDATE_INTERVAL)
         except Exception as e:
@@ -308,13 +553,14 @@ async def periodic_updates():
 
 @app.on_event("startup")
 async def startup_event():
+    await dashboard.log_query_plan()
     asyncio.create_task(periodic_updates())
     logger.info("Dashboard started successfully!")
 
 @app.on_event("shutdown") 
 async def shutdown_event():
-    if dashboard.influxdb_client:
-        dashboard.influxdb_client.close()
+    dashboard.shutting_down.set()
+    dashboard.close()
     logger.info("Dashboard stopped")
 
 @app.get("/health")
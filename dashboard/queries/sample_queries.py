@@ -3,102 +3,99 @@ Sample queries to explore the pizzeria data in InfluxDB 3 Core
 Run these queries to understand your data and create insights
 """
 
-from influxdb_client import InfluxDBClient
+from influxdb_client_3 import InfluxDBClient3
 import os
 
 # Configuration
-INFLUXDB_URL = f"http://{os.getenv('INFLUXDB_HOST', 'localhost')}:8181"
+INFLUXDB_HOST = f"http://{os.getenv('INFLUXDB_HOST', 'localhost')}:8181"
 INFLUXDB_TOKEN = os.getenv('INFLUXDB_TOKEN', 'your-token-here')
-INFLUXDB_ORG = os.getenv('INFLUXDB_ORG', 'papa_giuseppe')
-INFLUXDB_BUCKET = os.getenv('INFLUXDB_BUCKET', 'pizzeria_data')
+INFLUXDB_DATABASE = os.getenv('INFLUXDB_BUCKET', 'pizzeria_data')  # In v3, bucket = database
+
+# Queries are kept as fixed strings so every run sends byte-identical SQL
+CURRENT_OVEN_TEMPERATURES = """
+SELECT equipment_id,
+       selector_last(temperature, time)['time'] AS time,
+       selector_last(temperature, time)['value'] AS temperature
+FROM pizzeria_event
+WHERE time >= now() - interval '5 minutes'
+AND equipment_type = 'pizza_oven'
+AND event_type = 'temperature_reading'
+GROUP BY equipment_id
+ORDER BY equipment_id
+"""
+
+HOURLY_ORDER_VOLUME = """
+SELECT date_bin(interval '1 hour', time) AS time, COUNT(*) AS orders
+FROM pizzeria_event
+WHERE time >= now() - interval '24 hours'
+AND equipment_type = 'order_manager'
+AND event_type = 'order_created'
+GROUP BY 1
+ORDER BY time
+"""
+
+AVERAGE_COOK_TIME_BY_SIZE = """
+SELECT size, AVG(actual_cook_time) AS avg_cook_time
+FROM pizzeria_event
+WHERE time >= now() - interval '24 hours'
+AND equipment_type = 'pizza_oven'
+AND event_type = 'pizza_finished'
+GROUP BY size
+ORDER BY size
+"""
+
+MOST_POPULAR_PIZZA_TYPES = """
+SELECT pizza_type, COUNT(*) AS orders
+FROM pizzeria_event
+WHERE time >= now() - interval '24 hours'
+AND equipment_type = 'order_manager'
+AND event_type = 'order_created'
+GROUP BY pizza_type
+ORDER BY orders DESC
+"""
+
+OVEN_EFFICIENCY_OVER_TIME = """
+SELECT date_bin(interval '10 minutes', time) AS time, equipment_id, AVG(efficiency_score) AS efficiency_score
+FROM pizzeria_event
+WHERE time >= now() - interval '2 hours'
+AND equipment_type = 'pizza_oven'
+AND efficiency_score IS NOT NULL
+GROUP BY 1, equipment_id
+ORDER BY time, equipment_id
+"""
+
+SAMPLE_QUERIES = {
+    "Current Oven Temperatures": CURRENT_OVEN_TEMPERATURES,
+    "Hourly Order Volume": HOURLY_ORDER_VOLUME,
+    "Average Cook Time by Pizza Size": AVERAGE_COOK_TIME_BY_SIZE,
+    "Most Popular Pizza Types": MOST_POPULAR_PIZZA_TYPES,
+    "Oven Efficiency Over Time": OVEN_EFFICIENCY_OVER_TIME
+}
 
 def get_client():
-    return InfluxDBClient(url=INFLUXDB_URL, token=INFLUXDB_TOKEN, org=INFLUXDB_ORG)
+    return InfluxDBClient3(host=INFLUXDB_HOST, token=INFLUXDB_TOKEN, database=INFLUXDB_DATABASE)
 
 def run_sample_queries():
     client = get_client()
-    query_api = client.query_api()
-    
-    queries = {
-        "Current Oven Temperatures": f'''
-        from(bucket: "{INFLUXDB_BUCKET}")
-          |> range(start: -5m)
-          |> filter(fn: (r) => r._measurement == "pizzeria_event")
-          |> filter(fn: (r) => r.equipment_type == "pizza_oven")
-          |> filter(fn: (r) => r.event_type == "temperature_reading")
-          |> filter(fn: (r) => r._field == "temperature")
-          |> last()
-        ''',
-        
-        "Hourly Order Volume": f'''
-        from(bucket: "{INFLUXDB_BUCKET}")
-          |> range(start: -24h)
-          |> filter(fn: (r) => r._measurement == "pizzeria_event")
-          |> filter(fn: (r) => r.equipment_type == "order_manager")
-          |> filter(fn: (r) => r.event_type == "order_created")
-          |> aggregateWindow(every: 1h, fn: count)
-        ''',
-        
-        "Average Cook Time by Pizza Size": f'''
-        from(bucket: "{INFLUXDB_BUCKET}")
-          |> range(start: -24h)
-          |> filter(fn: (r) => r._measurement == "pizzeria_event")
-          |> filter(fn: (r) => r.equipment_type == "pizza_oven")
-          |> filter(fn: (r) => r.event_type == "pizza_finished")
-          |> filter(fn: (r) => r._field == "actual_cook_time")
-          |> group(columns: ["size"])
-          |> mean()
-        ''',
-        
-        "Most Popular Pizza Types": f'''
-        from(bucket: "{INFLUXDB_BUCKET}")
-          |> range(start: -24h)
-          |> filter(fn: (r) => r._measurement == "pizzeria_event")
-          |> filter(fn: (r) => r.equipment_type == "order_manager")
-          |> filter(fn: (r) => r.event_type == "order_created")
-          |> group(columns: ["pizza_type"])
-          |> count()
-          |> sort(columns: ["_value"], desc: true)
-        ''',
-        
-        "Oven Efficiency Over Time": f'''
-        from(bucket: "{INFLUXDB_BUCKET}")
-          |> range(start: -2h)
-          |> filter(fn: (r) => r._measurement == "pizzeria_event")
-          |> filter(fn: (r) => r.equipment_type == "pizza_oven")
-          |> filter(fn: (r) => r._field == "efficiency_score")
-          |> aggregateWindow(every: 10m, fn: mean)
-        '''
-    }
     
     print("🍕 Papa Giuseppe's Pizzeria - Data Analysis")
     print("=" * 50)
     
-    for title, query in queries.items():
+    for title, query in SAMPLE_QUERIES.items():
         print(f"\n📊 {title}")
         print("-" * 30)
         
         try:
-            result = query_api.query(query)
+            result = client.query(query=query, language="sql")
             
-            for table in result:
-                for record in table.records:
-                    time = record.get_time()
-                    value = record.get_value()
-                    field = record.get_field()
-                    
-                    # Extract relevant tags
-                    tags = []
-                    if 'equipment_id' in record.values:
-                        tags.append(f"Equipment: {record.values['equipment_id']}")
-                    if 'pizza_type' in record.values:
-                        tags.append(f"Type: {record.values['pizza_type']}")
-                    if 'size' in record.values:
-                        tags.append(f"Size: {record.values['size']}")
-                    
-                    tag_str = " | ".join(tags) if tags else ""
-                    
-                    print(f"  {time}: {field} = {value} {tag_str}")
+            for row in result.to_pylist():
+                time = row.pop("time", None)
+                values = " | ".join(f"{column}: {value}" for column, value in row.items())
+                
+                if time is not None:
+                    print(f"  {time}: {values}")
+                else:
+                    print(f"  {values}")
                     
         except Exception as e:
             print(f"  Error: {e}")
@@ -0,0 +1,43 @@
+"""
+Typed shapes of the dashboard sections sent to the browser.
+Encoding Structs skips the per-value type dispatch needed for plain dicts.
+"""
+
+from typing import Optional
+import msgspec
+
+class ResettableStruct(msgspec.Struct):
+    def reset(self):
+        """Restore every field that declares a default, before applying a new tick's readings"""
+        fields = self.__struct_fields__
+        defaults = self.__struct_defaults__
+        # Defaults cover the trailing fields, in declaration order
+        for name, default in zip(fields[len(fields) - len(defaults):], defaults):
+            setattr(self, name, default)
+
+class OvenState(ResettableStruct):
+    oven_id: str
+    temperature: float = 0
+    capacity_used: int = 0
+    capacity_total: int = 4
+    efficiency: float = 0
+    status: str = "offline"
+
+class OrderEntry(msgspec.Struct):
+    timestamp: Optional[str] = None
+    order_id: str = ""
+    pizza_type: str = ""
+    size: str = ""
+    status: str = ""
+    event_type: str = ""
+    duration: Optional[int] = None
+
+class MetricsBlock(ResettableStruct):
+    active_orders: int = 0
+    completed_orders: int = 0
+    avg_completion_time: float = 0
+    orders_received: int = 0
+    orders_prep: int = 0
+    orders_baking: int = 0
+    orders_ready: int = 0
+    rush_hour: bool = False
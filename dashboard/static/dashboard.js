@@ -5,6 +5,8 @@ class PizzeriaDashboard {
     this.maxReconnectAttempts = 10;
     this.reconnectDelay = 3000;
     this.lastUpdateTime = null;
+    this.decoder = new TextDecoder();
+    this.state = {};
 
     this.initializeWebSocket();
     this.setupControlHandlers();
@@ -17,6 +19,7 @@ class PizzeriaDashboard {
 
     try {
       this.ws = new WebSocket(wsUrl);
+      this.ws.binaryType = 'arraybuffer';
       this.setupWebSocketHandlers();
     } catch (error) {
       console.error('WebSocket connection failed:', error);
@@ -33,8 +36,13 @@ class PizzeriaDashboard {
 
     this.ws.onmessage = (event) => {
       try {
-        const data = JSON.parse(event.data);
-        this.handleDashboardUpdate(data);
+        // Updates are sent as UTF-8 encoded JSON in binary frames
+        const text = typeof event.data === 'string' ? event.data : this.decoder.decode(event.data);
+        const data = JSON.parse(text);
+        // Backlogged updates arrive coalesced as an array and are applied in order
+        const updates = Array.isArray(data) ? data : [data];
+        updates.forEach(update => this.applyUpdate(update));
+        this.handleDashboardUpdate(this.state);
       } catch (error) {
         console.error('Error parsing WebSocket message:', error);
       }
@@ -52,6 +60,16 @@ class PizzeriaDashboard {
     };
   }
 
+  applyUpdate(update) {
+    // Snapshots replace the dashboard state, deltas only carry the sections that changed
+    const { type, ...sections } = update;
+    if (type === 'delta') {
+      Object.assign(this.state, sections);
+    } else {
+      this.state = sections;
+    }
+  }
+
   attemptReconnection() {
     if (this.reconnectAttempts < this.maxReconnectAttempts) {
       this.reconnectAttempts++;
@@ -13,6 +13,12 @@ class PizzeriaConfig:
     rush_hour_multiplier: int = int(os.getenv('RUSH_HOUR_MULTIPLIER', '3'))
     base_orders_per_minute: float = float(os.getenv('BASE_ORDERS_PER_MINUTE', '0.5'))
     
+    # Publisher settings
+    timestamp_granularity_ms: float = float(os.getenv('TIMESTAMP_GRANULARITY_MS', '1'))
+    publish_flush_interval_ms: float = float(os.getenv('PUBLISH_FLUSH_INTERVAL_MS', '500'))
+    publish_priority_flush_interval_ms: float = float(os.getenv('PUBLISH_PRIORITY_FLUSH_INTERVAL_MS', '50'))
+    publish_buffer_size: int = int(os.getenv('PUBLISH_BUFFER_SIZE', '10000'))
+    
     # Pizza menu
     pizza_types: List[str] = None
     pizza_sizes: List[str] = None
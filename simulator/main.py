@@ -1,12 +1,13 @@
 # Initialize equipment
+import asyncio
 import logging
-import time
 import signal
-import sys
 from pizzeria.data_publisher import PizzeriaDataPublisher
-from pizzeria.pizza_oven import PizzaOven
+from pizzeria.batching_publisher import BatchingPublisher
+from pizzeria.pizza_oven import PizzaOven, regulate_temperatures
 from pizzeria.prep_station import PrepStation  
 from pizzeria.order_manager import OrderManager
+from pizzeria.kitchen_counters import KitchenCounters
 
 # Setup logging
 logging.basicConfig(
@@ -17,16 +18,17 @@ logger = logging.getLogger(__name__)
 
 class PizzeriaSimulator:
     def __init__(self):
-        self.publisher = PizzeriaDataPublisher()
+        self.publisher = BatchingPublisher(PizzeriaDataPublisher())
+        self.counters = KitchenCounters()
         self.ovens = [
-            PizzaOven("oven_1", capacity=4, publisher=self.publisher),
-            PizzaOven("oven_2", capacity=3, publisher=self.publisher),
-            PizzaOven("oven_3", capacity=2, publisher=self.publisher)
+            PizzaOven("oven_1", capacity=4, publisher=self.publisher, counters=self.counters),
+            PizzaOven("oven_2", capacity=3, publisher=self.publisher, counters=self.counters),
+            PizzaOven("oven_3", capacity=2, publisher=self.publisher, counters=self.counters)
         ]
         
         self.prep_stations = [
-            PrepStation("prep_1", publisher=self.publisher),
-            PrepStation("prep_2", publisher=self.publisher)
+            PrepStation("prep_1", publisher=self.publisher, counters=self.counters),
+            PrepStation("prep_2", publisher=self.publisher, counters=self.counters)
         ]
         
         # Initialize order manager
@@ -38,15 +40,23 @@ class PizzeriaSimulator:
         
         self.running = False
         
-    def start(self):
+    async def start(self):
         """Start the pizzeria simulation"""
         logger.info("🍕 Starting Papa Giuseppe's Pizzeria Simulation...")
         
         self.running = True
+        self._stopped = asyncio.Event()
         
-        # Start all equipment
+        # Every piece of equipment runs as tasks on this one event loop
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stop)
+        
+        # Start publishing batches, then all equipment
+        self.publisher.start()
         for oven in self.ovens:
             oven.start()
+        self._temperature_task = asyncio.create_task(regulate_temperatures(self.ovens))
             
         for station in self.prep_stations:
             station.start()
@@ -61,50 +71,43 @@ class PizzeriaSimulator:
         logger.info(f"   - {len(self.prep_stations)} Prep Stations")
         logger.info("   - Order Management System Active")
         
-        # Keep running
-        try:
-            while self.running:
-                time.sleep(10)
+        # Keep running until stop() is called
+        while self.running:
+            try:
+                await asyncio.wait_for(self._stopped.wait(), timeout=10)
+            except asyncio.TimeoutError:
                 self._log_status()
-        except KeyboardInterrupt:
-            self.stop()
     
     def stop(self):
         """Stop the simulation"""
+        if not self.running:
+            return
         logger.info("🛑 Stopping pizzeria simulation...")
         
         self.running = False
+        self._stopped.set()
         
         # Stop all equipment
         for oven in self.ovens:
             oven.stop()
+        self._temperature_task.cancel()
             
         for station in self.prep_stations:
             station.stop()
             
         self.order_manager.stop()
+        self.publisher.stop()
         
         logger.info("✅ Pizzeria simulation stopped")
     
     def _log_status(self):
         """Log current status"""
-        total_pizzas_cooking = sum(len(oven.current_pizzas) for oven in self.ovens)
-        total_orders_prepping = sum(len(station.current_orders) for station in self.prep_stations)
+        total_pizzas_cooking = self.counters.pizzas_cooking
+        total_orders_prepping = self.counters.orders_prepping
         
         logger.info(f"🍕 Status: {total_pizzas_cooking} pizzas cooking, {total_orders_prepping} orders in prep")
 
-def signal_handler(sig, frame):
-    """Handle shutdown signals"""
-    logger.info("Received shutdown signal")
-    if 'simulator' in globals():
-        simulator.stop()
-    sys.exit(0)
-
 if __name__ == "__main__":
-    # Setup signal handlers
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
-    
-    # Create and start simulator
+    # Create and start simulator; SIGINT/SIGTERM call simulator.stop()
     simulator = PizzeriaSimulator()
-    simulator.start()
\ No newline at end of file
+    asyncio.run(simulator.start())
\ No newline at end of file
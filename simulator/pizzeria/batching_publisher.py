@@ -0,0 +1,95 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Deque, Dict, List
+from config import config
+
+class BatchingPublisher:
+    """Buffers serialized events and publishes them to Kafka in batches"""
+    
+    # Events flushed on the short priority interval instead of the regular one
+    PRIORITY_EVENTS = frozenset({"order_delivered"})
+    # Low-rate events that are published as soon as they are created
+    IMMEDIATE_EVENTS = frozenset({"metrics_update"})
+    
+    def __init__(self, publisher):
+        self.publisher = publisher
+        self.logger = logging.getLogger(__name__)
+        # Bounded so a stalled broker drops the oldest events instead of growing without limit
+        self._events: Deque[bytes] = deque(maxlen=config.publish_buffer_size)
+        self._priority_events: Deque[bytes] = deque(maxlen=config.publish_buffer_size)
+        self._tasks: List[asyncio.Task] = []
+    
+    def start(self):
+        """Start the flush tasks on the running event loop"""
+        self._tasks = [
+            asyncio.create_task(self._flush_loop(self._events, config.publish_flush_interval_ms)),
+            asyncio.create_task(
+                self._flush_loop(self._priority_events, config.publish_priority_flush_interval_ms)
+            )
+        ]
+    
+    def stop(self):
+        """Stop the flush tasks and publish anything still buffered"""
+        for task in self._tasks:
+            task.cancel()
+        self.flush()
+    
+    def publish_oven_event(self, oven_id: str, event_type: str, **data):
+        """Queue pizza oven events"""
+        self._enqueue(event_type, self.publisher.create_message(
+            equipment_id=oven_id,
+            equipment_type="pizza_oven",
+            event_type=event_type,
+            data=data
+        ))
+    
+    def publish_prep_event(self, station_id: str, event_type: str, **data):
+        """Queue prep station events"""
+        self._enqueue(event_type, self.publisher.create_message(
+            equipment_id=station_id,
+            equipment_type="prep_station",
+            event_type=event_type,
+            data=data
+        ))
+    
+    def publish_order_event(self, event_type: str, **data):
+        """Queue order management events"""
+        self.publish_order_payload(event_type, data)
+    
+    def publish_order_payload(self, event_type: str, payload: Dict):
+        """Queue an order management event from a pre-built payload dict"""
+        self._enqueue(event_type, self.publisher.create_message(
+            equipment_id="order_system",
+            equipment_type="order_manager",
+            event_type=event_type,
+            data=payload
+        ))
+    
+    def _enqueue(self, event_type: str, message: bytes):
+        """Buffer a serialized message on the queue matching its event type"""
+        if event_type in self.IMMEDIATE_EVENTS:
+            self.publisher.publish_batch([message])
+        elif event_type in self.PRIORITY_EVENTS:
+            self._priority_events.append(message)
+        else:
+            self._events.append(message)
+    
+    async def _flush_loop(self, events: Deque[bytes], interval_ms: float):
+        """Publish the buffered events of one queue every interval"""
+        while True:
+            await asyncio.sleep(interval_ms / 1000)
+            self._drain(events)
+    
+    def _drain(self, events: Deque[bytes]):
+        """Publish and clear every message buffered on one queue"""
+        if events:
+            batch = list(events)
+            events.clear()
+            self.publisher.publish_batch(batch)
+    
+    def flush(self):
+        """Publish every buffered message and wait for the producer to send them"""
+        self._drain(self._priority_events)
+        self._drain(self._events)
+        self.publisher.flush()
@@ -1,79 +1,92 @@
-import json
+import orjson
 import time
 import logging
 from datetime import datetime, timezone
 from kafka import KafkaProducer
-from typing import Dict, Any
+from typing import Dict, List, Optional, Tuple
 from config import config
 
 class PizzeriaDataPublisher:
     def __init__(self):
         self.producer = KafkaProducer(
             bootstrap_servers=config.kafka_bootstrap_servers,
-            value_serializer=lambda v: json.dumps(v).encode('utf-8'),
-            key_serializer=lambda k: k.encode('utf-8') if k else None
+            # Messages are already serialized by create_message
+            value_serializer=None,
+            # Let the producer batch events instead of flushing each one
+            linger_ms=5,
+            batch_size=65536,
+            compression_type="lz4",
+            acks=1
         )
         self.logger = logging.getLogger(__name__)
+        # Pre-serialized base message per (equipment_id, equipment_type), without the closing brace
+        self._prefixes: Dict[Tuple[str, str], bytes] = {}
+        # Serialized timestamp reused until it is older than the configured granularity
+        self._timestamp_granularity_ns = int(config.timestamp_granularity_ms * 1_000_000)
+        self._cached_timestamp: Tuple[int, bytes] = (0, b"")
+    
+    def _message_prefix(self, equipment_id: str, equipment_type: str) -> bytes:
+        """Get the serialized fields shared by every message of one piece of equipment"""
+        prefix = self._prefixes.get((equipment_id, equipment_type))
+        if prefix is None:
+            prefix = orjson.dumps({
+                "measurement": "pizzeria_event",
+                "equipment_id": equipment_id,
+                "equipment_type": equipment_type,
+                "location": "main_kitchen"
+            })[:-1]
+            self._prefixes[(equipment_id, equipment_type)] = prefix
+        return prefix
+    
+    def _timestamp(self) -> bytes:
+        """Get the current UTC timestamp as JSON, refreshed at most once per granularity"""
+        now_ns = time.monotonic_ns()
+        cached_at, timestamp = self._cached_timestamp
+        if not timestamp or now_ns - cached_at >= self._timestamp_granularity_ns:
+            timestamp = orjson.dumps(datetime.now(timezone.utc).isoformat())
+            # The reading and its serialized timestamp are cached together as one pair
+            self._cached_timestamp = (now_ns, timestamp)
+        return timestamp
         
     def create_message(self, 
                       equipment_id: str,
                       equipment_type: str,
                       event_type: str,
-                      **kwargs) -> Dict[str, Any]:
+                      data: Optional[Dict] = None) -> bytes:
         """
         Create a standardized message following our Kafka Schema.
         This is where we implement the Message Schema for Kafka!
         """
         # Base message structure (our Kafka Message Schema)
-        message = {
-            "measurement": "pizzeria_event",
-            "equipment_id": equipment_id,
-            "equipment_type": equipment_type,
-            "location": "main_kitchen",
-            "event_type": event_type,
-            "timestamp": datetime.now(timezone.utc).isoformat()
-        }
-        
-        # Add all additional fields from kwargs
-        message.update(kwargs)
-        return message
-    
-    def publish_oven_event(self, oven_id: str, event_type: str, **data):
-        """Publish pizza oven events"""
-        message = self.create_message(
-            equipment_id=oven_id,
-            equipment_type="pizza_oven",
-            event_type=event_type,
-            **data
+        message = (
+            self._message_prefix(equipment_id, equipment_type)
+            + b',"event_type":' + orjson.dumps(event_type)
+            + b',"timestamp":' + self._timestamp()
         )
-        self._send_message(message)
+        
+        # Add all additional fields from data
+        if data:
+            return message + b"," + orjson.dumps(data)[1:]
+        return message + b"}"
     
-    def publish_prep_event(self, station_id: str, event_type: str, **data):
-        """Publish prep station events"""
-        message = self.create_message(
-            equipment_id=station_id,
-            equipment_type="prep_station", 
-            event_type=event_type,
-            **data
-        )
-        self._send_message(message)
+    def publish_batch(self, messages: List[bytes]):
+        """Publish several serialized messages as one JSON array record on the Kafka topic"""
+        if not messages:
+            return
+        try:
+            future = self.producer.send(config.kafka_topic, value=b"[" + b",".join(messages) + b"]")
+            future.add_errback(self._on_send_error, len(messages))
+            self.logger.debug(f"Published batch of {len(messages)} events")
+        except Exception as e:
+            self.logger.error(f"Failed to publish batch: {e}")
     
-    def publish_order_event(self, event_type: str, **data):
-        """Publish order management events"""
-        message = self.create_message(
-            equipment_id="order_system",
-            equipment_type="order_manager",
-            event_type=event_type,
-            **data
-        )
-        self._send_message(message)
+    def _on_send_error(self, count: int, error: Exception):
+        """Log batches the producer failed to deliver"""
+        self.logger.error(f"Failed to publish batch of {count} events: {error}")
     
-    def _send_message(self, message: Dict[str, Any]):
-        """Send message to Kafka topic"""
+    def flush(self):
+        """Send any batched messages still buffered in the producer"""
         try:
-            key = f"{message['equipment_id']}_{message['event_type']}"
-            future = self.producer.send(config.kafka_topic, key=key, value=message)
-            self.producer.flush()  # Ensure message is sent
-            self.logger.debug(f"Published: {key} -> {message['event_type']}")
+            self.producer.flush()
         except Exception as e:
-            self.logger.error(f"Failed to publish message: {e}")
\ No newline at end of file
+            self.logger.error(f"Failed to flush messages: {e}")
\ No newline at end of file
@@ -0,0 +1,11 @@
+class KitchenCounters:
+    """Running totals of work in progress, shared by all kitchen equipment"""
+    
+    def __init__(self):
+        self.pizzas_cooking = 0
+        self.orders_prepping = 0
+    
+    def adjust(self, pizzas_cooking: int = 0, orders_prepping: int = 0):
+        """Apply a change reported by a piece of equipment"""
+        self.pizzas_cooking += pizzas_cooking
+        self.orders_prepping += orders_prepping
\ No newline at end of file
@@ -1,109 +1,177 @@
+import asyncio
 import random
 import time
-import threading
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from collections import deque
+from functools import partial
+from itertools import islice
+from datetime import datetime
+from typing import Deque, Dict, List, Optional
 from dataclasses import dataclass, field
-from enum import Enum
+from enum import IntEnum
 from config import config
+from pizzeria.sampling import BernoulliCountdown, geometric_ticks
 
-class OrderStatus(Enum):
-    RECEIVED = "received"
-    PREP = "prep" 
-    BAKING = "baking"
-    READY = "ready"
-    DELIVERED = "delivered"
+class OrderStatus(IntEnum):
+    RECEIVED = 0
+    PREP = 1
+    BAKING = 2
+    READY = 3
+    DELIVERED = 4
 
-@dataclass
+# Published status names, indexed by OrderStatus
+STATUS_NAMES = ("received", "prep", "baking", "ready", "delivered")
+
+# Sizes are referenced by index so per-size lookups are tuple loads instead of dict lookups
+_SIZES = tuple(config.pizza_sizes)
+_PREP_TIME_BY_SIZE = tuple(
+    {'small': 120, 'medium': 180, 'large': 240, 'xlarge': 300}.get(size, 180) for size in _SIZES
+)
+_COOK_TIME_BY_SIZE = tuple(
+    {'small': 480, 'medium': 600, 'large': 720, 'xlarge': 900}.get(size, 600) for size in _SIZES
+)
+# Every (pizza_type, size_idx) pair on the menu, so one draw picks both
+_MENU = tuple((pizza_type, size_idx) for pizza_type in config.pizza_types for size_idx in range(len(_SIZES)))
+
+def _current_hour() -> int:
+    """Local hour of the day, without building a datetime"""
+    return time.localtime().tm_hour
+
+@dataclass(slots=True)
 class Order:
     order_id: str
     pizza_type: str
     size: str
+    size_idx: int
     status: OrderStatus = OrderStatus.RECEIVED
     created_at: datetime = field(default_factory=datetime.now)
-    prep_start: Optional[datetime] = None
-    baking_start: Optional[datetime] = None
-    ready_at: Optional[datetime] = None
-    delivered_at: Optional[datetime] = None
+    # Stage timestamps are time.monotonic() readings
+    created_mono: float = field(default_factory=time.monotonic)
+    prep_start: Optional[float] = None
+    baking_start: Optional[float] = None
+    ready_at: Optional[float] = None
+    delivered_at: Optional[float] = None
+    # Processing cycles left before the pizza is taken out of the oven
+    bake_checks_left: int = 0
     
     @property
     def total_time(self) -> Optional[int]:
         """Total order time in seconds"""
-        if self.delivered_at:
-            return int((self.delivered_at - self.created_at).total_seconds())
+        if self.delivered_at is not None:
+            return int(self.delivered_at - self.created_mono)
         return None
     
     @property
     def current_duration(self) -> int:
         """Current order duration in seconds"""
-        return int((datetime.now() - self.created_at).total_seconds())
+        return int(time.monotonic() - self.created_mono)
 
 class OrderManager:
+    # Fixed shape of order_status_update payloads; copied and filled in per event
+    _STATUS_UPDATE_TEMPLATE = {
+        "order_id": None,
+        "pizza_type": None,
+        "size": None,
+        "status": None,
+        "duration": 0
+    }
+    
     def __init__(self, publisher=None, prep_stations=None, ovens=None):
         self.publisher = publisher
         self.prep_stations = prep_stations or []
         self.ovens = ovens or []
+        # Bit i is set while self.ovens[i] may have space; ovens report back when a full one frees up
+        self._oven_free_mask = (1 << len(self.ovens)) - 1
+        for idx, oven in enumerate(self.ovens):
+            oven.on_space_available = partial(self._mark_oven_free, idx)
+        # Orders still in the pipeline in creation order (newest last); delivered orders move to _delivered
         self.orders: Dict[str, Order] = {}
+        # Active orders indexed by status (insertion ordered) so each stage only touches its own orders
+        self._by_status: Dict[OrderStatus, Dict[str, Order]] = {
+            status: {} for status in OrderStatus if status is not OrderStatus.DELIVERED
+        }
+        # Most recent deliveries, plus running totals covering every delivered order
+        self._delivered: Deque[Order] = deque(maxlen=1024)
+        self._delivered_count = 0
+        # Average completion time divisor; unlike _delivered_count it skips orders with no recorded total_time
+        self._total_completion_seconds = 0
+        self._timed_delivery_count = 0
         self.order_counter = 1
         self.is_running = False
+        self._order_chance = BernoulliCountdown(0.8)
+        self._tasks: List[asyncio.Task] = []
         
         # Rush hour settings
         self.rush_hours = [(11, 14), (17, 21)]  # 11am-2pm, 5pm-9pm
+        # Bit h is set when hour h falls in a rush window
+        self._rush_mask = 0
+        for start, end in self.rush_hours:
+            for hour in range(start, end):
+                self._rush_mask |= 1 << hour
+        
+        # Seconds between orders for normal and rush hours
+        self._seconds_between_orders_normal = self._seconds_between_orders(config.base_orders_per_minute)
+        self._seconds_between_orders_rush = self._seconds_between_orders(
+            config.base_orders_per_minute * config.rush_hour_multiplier
+        )
         
     def start(self):
-        """Start the order management system"""
+        """Start the order management tasks on the running event loop"""
         self.is_running = True
-        threading.Thread(target=self._generate_orders, daemon=True).start()
-        threading.Thread(target=self._process_orders, daemon=True).start()
-        threading.Thread(target=self._publish_metrics, daemon=True).start()
+        self._tasks = [
+            asyncio.create_task(self._generate_orders()),
+            asyncio.create_task(self._process_orders()),
+            asyncio.create_task(self._publish_metrics())
+        ]
     
     def stop(self):
         """Stop the order manager"""
         self.is_running = False
+        for task in self._tasks:
+            task.cancel()
     
-    def _generate_orders(self):
+    async def _generate_orders(self):
         """Generate new orders based on time of day"""
         while self.is_running:
-            current_hour = datetime.now().hour
-            
-            # Determine if it's rush hour
-            is_rush_hour = any(start <= current_hour < end for start, end in self.rush_hours)
-            
-            # Calculate order rate
-            base_rate = config.base_orders_per_minute
-            if is_rush_hour:
-                order_rate = base_rate * config.rush_hour_multiplier
+            if self._is_rush_hour(_current_hour()):
+                seconds_between_orders = self._seconds_between_orders_rush
             else:
-                order_rate = base_rate
-            
-            # Convert to seconds between orders  
-            seconds_between_orders = 60 / order_rate if order_rate > 0 else 60
+                seconds_between_orders = self._seconds_between_orders_normal
             
             # Add some randomness
             wait_time = seconds_between_orders + random.uniform(-10, 20)
             wait_time = max(5, wait_time)  # Minimum 5 seconds between orders
             
-            time.sleep(wait_time)
+            await asyncio.sleep(wait_time)
             
             # Create new order
-            if random.random() < 0.8:  # 80% chance to actually create order
+            if self._order_chance.tick():  # 80% chance to actually create order
                 self._create_order()
     
+    @staticmethod
+    def _seconds_between_orders(order_rate: float) -> float:
+        """Convert an order rate per minute to seconds between orders"""
+        return 60 / order_rate if order_rate > 0 else 60
+    
+    def _is_rush_hour(self, hour: int) -> bool:
+        return bool((self._rush_mask >> hour) & 1)
+    
     def _create_order(self):
         """Create a new pizza order"""
         order_id = f"ORD-{self.order_counter:04d}"
         self.order_counter += 1
         
-        pizza_type = random.choice(config.pizza_types)
-        size = random.choice(config.pizza_sizes)
+        pizza_type, size_idx = random.choice(_MENU)
+        size = _SIZES[size_idx]
         
         order = Order(
             order_id=order_id,
             pizza_type=pizza_type,
-            size=size
+            size=size,
+            size_idx=size_idx
         )
         
         self.orders[order_id] = order
+        self._by_status[order.status][order_id] = order
         
         if self.publisher:
             self.publisher.publish_order_event(
@@ -111,75 +179,54 @@ class OrderManager:
                 order_id=order_id,
                 pizza_type=pizza_type,
                 size=size,
-                status=order.status.value,
-                estimated_total_time=self._estimate_total_time(pizza_type, size),
-                current_queue_length=len([o for o in self.orders.values() if o.status != OrderStatus.DELIVERED])
+                status=STATUS_NAMES[order.status],
+                estimated_total_time=self._estimate_total_time(size_idx),
+                current_queue_length=self._active_count()
             )
         
         print(f"🍕 New Order: {order_id} - {size} {pizza_type}")
     
-    def _process_orders(self):
+    async def _process_orders(self):
         """Process orders through the pipeline"""
         while self.is_running:
+            now = time.monotonic()
+            
             # Move orders from RECEIVED to PREP
-            received_orders = [o for o in self.orders.values() if o.status == OrderStatus.RECEIVED]
-            for order in received_orders[:2]:  # Process max 2 at a time
+            received_orders = list(islice(self._by_status[OrderStatus.RECEIVED].values(), 2))
+            for order in received_orders:  # Process max 2 at a time
                 if self._send_to_prep(order):
-                    order.status = OrderStatus.PREP
-                    order.prep_start = datetime.now()
-                    
-                    if self.publisher:
-                        self.publisher.publish_order_event(
-                            event_type="order_status_update",
-                            order_id=order.order_id,
-                            pizza_type=order.pizza_type,
-                            size=order.size,
-                            status=order.status.value,
-                            duration=order.current_duration
-                        )
+                    order.prep_start = now
+                    self._set_status(order, OrderStatus.PREP)
+                    self._publish_status_update(order)
             
             # Move orders from PREP to BAKING
-            prep_orders = [o for o in self.orders.values() if o.status == OrderStatus.PREP]
+            prep_orders = list(self._by_status[OrderStatus.PREP].values())
             for order in prep_orders:
                 if self._send_to_oven(order):
-                    order.status = OrderStatus.BAKING
-                    order.baking_start = datetime.now()
-                    
-                    if self.publisher:
-                        self.publisher.publish_order_event(
-                            event_type="order_status_update",
-                            order_id=order.order_id,
-                            pizza_type=order.pizza_type,
-                            size=order.size,
-                            status=order.status.value,
-                            duration=order.current_duration
-                        )
+                    order.baking_start = now
+                    order.bake_checks_left = geometric_ticks(0.05)
+                    self._set_status(order, OrderStatus.BAKING)
+                    self._publish_status_update(order)
             
             # Check for finished pizzas
-            baking_orders = [o for o in self.orders.values() if o.status == OrderStatus.BAKING]
+            baking_orders = list(self._by_status[OrderStatus.BAKING].values())
             for order in baking_orders:
                 # Check if any oven has finished this pizza (simplified check)
-                if random.random() < 0.05:  # 5% chance per cycle that pizza is done
-                    order.status = OrderStatus.READY
-                    order.ready_at = datetime.now()
-                    
-                    if self.publisher:
-                        self.publisher.publish_order_event(
-                            event_type="order_status_update",
-                            order_id=order.order_id,
-                            pizza_type=order.pizza_type,
-                            size=order.size,
-                            status=order.status.value,
-                            duration=order.current_duration
-                        )
+                # 5% chance per cycle that pizza is done, drawn once when baking starts
+                if order.bake_checks_left:
+                    order.bake_checks_left -= 1
+                else:
+                    order.ready_at = now
+                    self._set_status(order, OrderStatus.READY)
+                    self._publish_status_update(order)
             
             # Simulate customer pickup/delivery
-            ready_orders = [o for o in self.orders.values() if o.status == OrderStatus.READY]
+            ready_orders = list(self._by_status[OrderStatus.READY].values())
             for order in ready_orders:
                 # Orders get picked up after being ready for 2-10 minutes
-                if order.ready_at and (datetime.now() - order.ready_at).total_seconds() > random.randint(120, 600):
-                    order.status = OrderStatus.DELIVERED
-                    order.delivered_at = datetime.now()
+                if order.ready_at is not None and now - order.ready_at > random.randint(120, 600):
+                    order.delivered_at = now
+                    self._set_status(order, OrderStatus.DELIVERED)
                     
                     if self.publisher:
                         self.publisher.publish_order_event(
@@ -187,14 +234,58 @@ class OrderManager:
                             order_id=order.order_id,
                             pizza_type=order.pizza_type,
                             size=order.size,
-                            status=order.status.value,
+                            status=STATUS_NAMES[order.status],
                             total_time=order.total_time,
                             duration=order.current_duration
                         )
                     
                     print(f"✅ Delivered: {order.order_id} - Total time: {order.total_time}s")
             
-            time.sleep(5)
+            await asyncio.sleep(5)
+    
+    def _publish_status_update(self, order: Order):
+        """Publish an order_status_update event for an order"""
+        if not self.publisher:
+            return
+        payload = self._STATUS_UPDATE_TEMPLATE.copy()
+        payload["order_id"] = order.order_id
+        payload["pizza_type"] = order.pizza_type
+        payload["size"] = order.size
+        payload["status"] = STATUS_NAMES[order.status]
+        payload["duration"] = order.current_duration
+        self.publisher.publish_order_payload("order_status_update", payload)
+    
+    def _set_status(self, order: Order, status: OrderStatus):
+        """Move an order to a new status, keeping the status index and completion totals in sync"""
+        del self._by_status[order.status][order.order_id]
+        order.status = status
+        
+        if status is OrderStatus.DELIVERED:
+            # Delivered orders leave the working set and only the most recent are kept
+            del self.orders[order.order_id]
+            self._delivered.append(order)
+            self._delivered_count += 1
+            if order.total_time:
+                self._total_completion_seconds += order.total_time
+                self._timed_delivery_count += 1
+        else:
+            self._by_status[status][order.order_id] = order
+    
+    def _active_count(self) -> int:
+        """Number of orders not yet delivered"""
+        return len(self.orders)
+    
+    def _avg_completion_time(self) -> float:
+        """Average seconds from order to delivery, over every delivered order with a recorded time"""
+        if not self._timed_delivery_count:
+            return 0
+        return self._total_completion_seconds / self._timed_delivery_count
+    
+    def _orders_by_status(self) -> Dict[str, int]:
+        """Order counts keyed by status value"""
+        counts = {STATUS_NAMES[status]: len(orders) for status, orders in self._by_status.items()}
+        counts[STATUS_NAMES[OrderStatus.DELIVERED]] = self._delivered_count
+        return counts
     
     def _send_to_prep(self, order: Order) -> bool:
         """Try to send order to prep station"""
@@ -204,67 +295,69 @@ class OrderManager:
         return False
     
     def _send_to_oven(self, order: Order) -> bool:
-        """Try to send order to oven"""
-        for oven in self.ovens:
-            if oven.add_pizza(order.order_id, order.pizza_type, order.size):
+        """Try to send order to the first oven with space"""
+        while self._oven_free_mask:
+            # Lowest set bit is the first oven with space
+            idx = (self._oven_free_mask & -self._oven_free_mask).bit_length() - 1
+            oven = self.ovens[idx]
+            added = oven.add_pizza(order.order_id, order.pizza_type, order.size)
+            if not oven.has_space:
+                self._oven_free_mask &= ~(1 << idx)
+            if added:
                 return True
         return False
     
-    def _estimate_total_time(self, pizza_type: str, size: str) -> int:
+    def _mark_oven_free(self, idx: int):
+        """Make an oven eligible for new pizzas again"""
+        self._oven_free_mask |= 1 << idx
+    
+    def _estimate_total_time(self, size_idx: int) -> int:
         """Estimate total order time"""
-        prep_time = {'small': 120, 'medium': 180, 'large': 240, 'xlarge': 300}.get(size, 180)
-        cook_time = {'small': 480, 'medium': 600, 'large': 720, 'xlarge': 900}.get(size, 600)
-        return prep_time + cook_time + random.randint(60, 180)  # Add queue time
+        return _PREP_TIME_BY_SIZE[size_idx] + _COOK_TIME_BY_SIZE[size_idx] + random.randint(60, 180)  # Add queue time
     
-    def _publish_metrics(self):
+    async def _publish_metrics(self):
         """Publish periodic metrics"""
         while self.is_running:
-            active_orders = [o for o in self.orders.values() if o.status != OrderStatus.DELIVERED]
-            completed_orders = [o for o in self.orders.values() if o.status == OrderStatus.DELIVERED]
-            
             # Calculate metrics
-            avg_completion_time = 0
-            if completed_orders:
-                times = [o.total_time for o in completed_orders if o.total_time]
-                avg_completion_time = sum(times) / len(times) if times else 0
-            
-            orders_by_status = {}
-            for status in OrderStatus:
-                count = len([o for o in self.orders.values() if o.status == status])
-                orders_by_status[status.value] = count
+            orders_by_status = self._orders_by_status()
             
             if self.publisher:
                 self.publisher.publish_order_event(
                     event_type="metrics_update",
-                    active_orders=len(active_orders),
-                    completed_orders=len(completed_orders),
-                    avg_completion_time=round(avg_completion_time, 1),
+                    active_orders=self._active_count(),
+                    completed_orders=self._delivered_count,
+                    avg_completion_time=round(self._avg_completion_time(), 1),
                     orders_by_status=orders_by_status,
-                    total_orders_today=len(self.orders),
-                    current_hour_rush=any(start <= datetime.now().hour < end for start, end in self.rush_hours)
+                    total_orders_today=self._active_count() + self._delivered_count,
+                    current_hour_rush=self._is_rush_hour(_current_hour())
                 )
             
-            time.sleep(10)
+            await asyncio.sleep(10)
     
     @property
     def status(self) -> Dict:
         """Get current order management status"""
-        active_orders = [o for o in self.orders.values() if o.status != OrderStatus.DELIVERED]
-        
         return {
-            'active_orders': len(active_orders),
-            'total_orders': len(self.orders),
-            'orders_by_status': {
-                status.value: len([o for o in self.orders.values() if o.status == status])
-                for status in OrderStatus
-            },
+            'active_orders': self._active_count(),
+            'completed_orders': self._delivered_count,
+            'total_orders': self._active_count() + self._delivered_count,
+            'avg_completion_time': round(self._avg_completion_time(), 1),
+            'orders_by_status': self._orders_by_status(),
             'recent_orders': [
                 {
                     'order_id': o.order_id,
                     'pizza_type': o.pizza_type,
                     'size': o.size,
-                    'status': o.status.value,
+                    'status': STATUS_NAMES[o.status],
                     'duration': o.current_duration
-                } for o in sorted(active_orders, key=lambda x: x.created_at, reverse=True)[:10]
+                } for o in islice(reversed(self.orders.values()), 10)
+            ],
+            'recent_deliveries': [
+                {
+                    'order_id': o.order_id,
+                    'pizza_type': o.pizza_type,
+                    'size': o.size,
+                    'total_time': o.total_time
+                } for o in islice(reversed(self._delivered), 10)
             ]
         }
\ No newline at end of file
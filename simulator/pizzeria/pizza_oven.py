@@ -1,37 +1,71 @@
+import asyncio
+import heapq
 import random
 import time
-import threading
-from dataclasses import dataclass
-from typing import Dict, Optional, List
-from datetime import datetime, timedelta
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, List, Tuple
+from pizzeria.sampling import BernoulliCountdown
 
-@dataclass
+@dataclass(slots=True)
 class Pizza:
     order_id: str
     pizza_type: str
     size: str
-    start_time: datetime
+    start_time: float  # time.monotonic() when the pizza went in
     cook_time: int  # seconds
+    deadline: float = field(init=False)
     
-    @property
-    def is_ready(self) -> bool:
-        return datetime.now() >= self.start_time + timedelta(seconds=self.cook_time)
+    def __post_init__(self):
+        self.deadline = self.start_time + self.cook_time
     
-    @property
-    def time_remaining(self) -> int:
-        remaining = (self.start_time + timedelta(seconds=self.cook_time) - datetime.now()).total_seconds()
-        return max(0, int(remaining))
+    def time_remaining(self, now: float) -> int:
+        return max(0, int(self.deadline - now))
+
+# Finished pizzas are recycled so steady-state baking does not allocate a Pizza per order
+_PIZZA_POOL_SIZE = 256
+_pizza_pool: List[Pizza] = []
+
+def _acquire_pizza(order_id: str, pizza_type: str, size: str, start_time: float, cook_time: int) -> Pizza:
+    """Get a reinitialized Pizza from the pool, or a new one if the pool is empty"""
+    if _pizza_pool:
+        pizza = _pizza_pool.pop()
+        pizza.__init__(order_id, pizza_type, size, start_time, cook_time)
+        return pizza
+    return Pizza(order_id, pizza_type, size, start_time, cook_time)
+
+def _release_pizza(pizza: Pizza):
+    """Return a finished pizza to the pool"""
+    if len(_pizza_pool) < _PIZZA_POOL_SIZE:
+        _pizza_pool.append(pizza)
+
+async def regulate_temperatures(ovens: List["PizzaOven"], interval: float = 5):
+    """Simulate temperature fluctuations for every running oven from a single task"""
+    loop = asyncio.get_running_loop()
+    while True:
+        for oven in ovens:
+            if oven.is_running:
+                oven.update_temperature(loop)
+        await asyncio.sleep(interval)
 
 class PizzaOven:
-    def __init__(self, oven_id: str, capacity: int = 4, publisher=None):
+    def __init__(self, oven_id: str, capacity: int = 4, publisher=None, counters=None):
         self.oven_id = oven_id
         self.capacity = capacity
         self.publisher = publisher
-        self.current_pizzas: List[Pizza] = []
+        self.counters = counters
+        self.current_pizzas: Dict[str, Pizza] = {}
+        # Min-heap of (deadline, order_id) so the monitor only looks at the next pizza due
+        self._deadlines: List[Tuple[float, str]] = []
+        # Called when finished pizzas free up space in an oven that was full
+        self.on_space_available: Optional[Callable[[], None]] = None
+        self.status_interval = 2  # seconds between status readings
         self.target_temperature = 450.0
         self.current_temperature = 450.0
         self.is_running = False
+        self._tasks: List[asyncio.Task] = []
         self.door_open = False
+        self._reading_chance = BernoulliCountdown(0.3)
+        self._door_chance = BernoulliCountdown(0.1)
         
         # Cooking times by size (in seconds)
         self.cook_times = {
@@ -42,14 +76,20 @@ class PizzaOven:
         }
     
     def start(self):
-        """Start the oven monitoring thread"""
+        """Start the oven monitoring tasks on the running event loop"""
         self.is_running = True
-        threading.Thread(target=self._monitor_oven, daemon=True).start()
-        threading.Thread(target=self._temperature_fluctuation, daemon=True).start()
+        self._tasks = [asyncio.create_task(self._monitor_oven())]
     
     def stop(self):
         """Stop the oven"""
         self.is_running = False
+        for task in self._tasks:
+            task.cancel()
+    
+    @property
+    def has_space(self) -> bool:
+        """Whether the oven can take another pizza"""
+        return len(self.current_pizzas) < self.capacity
     
     def add_pizza(self, order_id: str, pizza_type: str, size: str) -> bool:
         """Add a pizza to the oven if there's space"""
@@ -60,15 +100,12 @@ class PizzaOven:
         # Add some randomness to cook times
         cook_time += random.randint(-30, 60)
         
-        pizza = Pizza(
-            order_id=order_id,
-            pizza_type=pizza_type, 
-            size=size,
-            start_time=datetime.now(),
-            cook_time=cook_time
-        )
+        pizza = _acquire_pizza(order_id, pizza_type, size, time.monotonic(), cook_time)
         
-        self.current_pizzas.append(pizza)
+        self.current_pizzas[order_id] = pizza
+        heapq.heappush(self._deadlines, (pizza.deadline, order_id))
+        if self.counters:
+            self.counters.adjust(pizzas_cooking=1)
         
         if self.publisher:
             self.publisher.publish_oven_event(
@@ -85,15 +122,25 @@ class PizzaOven:
         
         return True
     
-    def _monitor_oven(self):
+    async def _monitor_oven(self):
         """Monitor oven and check for finished pizzas"""
+        next_status = time.monotonic()
         while self.is_running:
-            # Check for finished pizzas
-            finished_pizzas = [p for p in self.current_pizzas if p.is_ready]
+            # Pop every pizza whose deadline has passed
+            now = time.monotonic()
+            finished_pizzas = []
+            was_full = not self.has_space
+            while self._deadlines and self._deadlines[0][0] <= now:
+                _, order_id = heapq.heappop(self._deadlines)
+                finished_pizzas.append(self.current_pizzas.pop(order_id))
+            
+            if finished_pizzas:
+                if self.counters:
+                    self.counters.adjust(pizzas_cooking=-len(finished_pizzas))
+                if was_full and self.on_space_available:
+                    self.on_space_available()
             
             for pizza in finished_pizzas:
-                self.current_pizzas.remove(pizza)
-                
                 if self.publisher:
                     self.publisher.publish_oven_event(
                         oven_id=self.oven_id,
@@ -101,51 +148,63 @@ class PizzaOven:
                         order_id=pizza.order_id,
                         pizza_type=pizza.pizza_type,
                         size=pizza.size,
-                        actual_cook_time=int((datetime.now() - pizza.start_time).total_seconds()),
+                        actual_cook_time=int(now - pizza.start_time),
                         temperature=self.current_temperature,
                         capacity_used=len(self.current_pizzas),
                         capacity_total=self.capacity
                     )
+                _release_pizza(pizza)
             
             # Publish current status
-            if self.publisher and random.random() < 0.3:  # 30% chance each cycle
-                self.publisher.publish_oven_event(
-                    oven_id=self.oven_id,
-                    event_type="temperature_reading",
-                    temperature=self.current_temperature,
-                    capacity_used=len(self.current_pizzas),
-                    capacity_total=self.capacity,
-                    pizzas_cooking=len(self.current_pizzas),
-                    door_open=self.door_open,
-                    efficiency_score=self._calculate_efficiency()
-                )
+            if now >= next_status:
+                next_status = now + self.status_interval
+                if self.publisher and self._reading_chance.tick():  # 30% chance each cycle
+                    self._publish_temperature_reading()
             
-            time.sleep(2)
+            # Sleep until the next pizza is due or the next status reading, whichever is first
+            wake_at = next_status
+            if self._deadlines:
+                wake_at = min(wake_at, self._deadlines[0][0])
+            await asyncio.sleep(max(0.1, wake_at - time.monotonic()))
     
-    def _temperature_fluctuation(self):
-        """Simulate realistic temperature fluctuations"""
-        while self.is_running:
-            # Door opening simulation
-            if len(self.current_pizzas) > 0 and random.random() < 0.1:  # 10% chance
-                self.door_open = True
-                # Temperature drops when door opens
-                self.current_temperature = max(300, self.current_temperature - random.randint(20, 50))
-                time.sleep(1)
-                self.door_open = False
-            
-            # Normal temperature regulation
-            temp_diff = self.target_temperature - self.current_temperature
-            if abs(temp_diff) > 5:
-                adjustment = temp_diff * 0.1 + random.uniform(-2, 2)
-                self.current_temperature += adjustment
-            else:
-                # Small random fluctuations
-                self.current_temperature += random.uniform(-3, 3)
-            
-            # Keep temperature within reasonable bounds
-            self.current_temperature = max(200, min(500, self.current_temperature))
-            
-            time.sleep(5)
+    def _publish_temperature_reading(self):
+        """Publish the current oven temperature and load"""
+        self.publisher.publish_oven_event(
+            oven_id=self.oven_id,
+            event_type="temperature_reading",
+            temperature=self.current_temperature,
+            capacity_used=len(self.current_pizzas),
+            capacity_total=self.capacity,
+            pizzas_cooking=len(self.current_pizzas),
+            door_open=self.door_open,
+            efficiency_score=self._calculate_efficiency()
+        )
+    
+    def update_temperature(self, loop: asyncio.AbstractEventLoop):
+        """Advance the simulated temperature by one regulation step"""
+        temperature = self.current_temperature
+        
+        # Door opening simulation
+        if self.current_pizzas and self._door_chance.tick():  # 10% chance
+            self.door_open = True
+            # Temperature drops when door opens
+            temperature = max(300, temperature - random.randint(20, 50))
+            loop.call_later(1, self._close_door)
+        
+        # Normal temperature regulation
+        temp_diff = self.target_temperature - temperature
+        if temp_diff > 5 or temp_diff < -5:
+            temperature += temp_diff * 0.1 + random.uniform(-2, 2)
+        else:
+            # Small random fluctuations
+            temperature += random.uniform(-3, 3)
+        
+        # Keep temperature within reasonable bounds
+        self.current_temperature = 200 if temperature < 200 else 500 if temperature > 500 else temperature
+    
+    def _close_door(self):
+        """Close the door after a simulated opening"""
+        self.door_open = False
     
     def _calculate_efficiency(self) -> float:
         """Calculate oven efficiency based on usage and temperature"""
@@ -156,6 +215,7 @@ class PizzaOven:
     @property 
     def status(self) -> Dict:
         """Get current oven status"""
+        now = time.monotonic()
         return {
             'oven_id': self.oven_id,
             'temperature': round(self.current_temperature, 1),
@@ -167,8 +227,8 @@ class PizzaOven:
                     'order_id': p.order_id,
                     'pizza_type': p.pizza_type,
                     'size': p.size,
-                    'time_remaining': p.time_remaining
-                } for p in self.current_pizzas
+                    'time_remaining': p.time_remaining(now)
+                } for p in self.current_pizzas.values()
             ],
             'efficiency': self._calculate_efficiency()
         }
\ No newline at end of file
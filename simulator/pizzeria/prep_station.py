@@ -1,28 +1,89 @@
+import asyncio
+import heapq
 import random
 import time
-import threading
-from datetime import datetime
-from typing import List, Dict
-from dataclasses import dataclass
+from typing import List, Dict, Tuple
+from dataclasses import dataclass, field
+from config import config
+from pizzeria.sampling import BernoulliCountdown
 
-@dataclass 
+# Inventory slots, in the order PrepStation.inventory stores them
+_INGREDIENT_NAMES = ('dough', 'sauce', 'cheese', 'pepperoni', 'mushrooms', 'peppers', 'ham', 'pineapple')
+_INGREDIENT_INDEX = {name: i for i, name in enumerate(_INGREDIENT_NAMES)}
+
+# Required ingredients per pizza type, merged once at import as (inventory slot, amount) pairs
+_BASE_INGREDIENTS = {'dough': 1, 'sauce': 1, 'cheese': 1}
+
+_EXTRA_INGREDIENTS = {
+    'pepperoni': {'pepperoni': 2},
+    'supreme': {'pepperoni': 1, 'mushrooms': 1, 'peppers': 1},
+    'hawaiian': {'ham': 2, 'pineapple': 1},
+    'veggie': {'mushrooms': 2, 'peppers': 2},
+    'meat_lovers': {'pepperoni': 2, 'ham': 1}
+}
+
+def _inventory_slots(ingredients: Dict[str, int]) -> Tuple[Tuple[int, int], ...]:
+    """Convert ingredient amounts keyed by name to (inventory slot, amount) pairs"""
+    return tuple((_INGREDIENT_INDEX[name], amount) for name, amount in ingredients.items())
+
+_BASE_REQUIRED = _inventory_slots(_BASE_INGREDIENTS)
+
+_REQUIRED: Dict[str, Tuple[Tuple[int, int], ...]] = {
+    pizza_type: _inventory_slots({**_BASE_INGREDIENTS, **_EXTRA_INGREDIENTS.get(pizza_type, {})})
+    for pizza_type in config.pizza_types
+}
+
+def _required_ingredients(pizza_type: str) -> Tuple[Tuple[int, int], ...]:
+    """Get required ingredients for pizza type"""
+    required = _REQUIRED.get(pizza_type)
+    if required is None:
+        required = _REQUIRED[pizza_type] = _BASE_REQUIRED
+    return required
+
+@dataclass(slots=True)
 class PrepOrder:
     order_id: str
     pizza_type: str
     size: str
-    start_time: datetime
+    start_time: float  # time.monotonic() when prep started
     prep_time: int
+    deadline: float = field(init=False)
     
-    @property
-    def is_ready(self) -> bool:
-        return (datetime.now() - self.start_time).total_seconds() >= self.prep_time
+    def __post_init__(self):
+        self.deadline = self.start_time + self.prep_time
+    
+    def time_remaining(self, now: float) -> int:
+        return max(0, int(self.deadline - now))
+
+# Completed prep orders are recycled so steady-state prep does not allocate a PrepOrder per order
+_PREP_ORDER_POOL_SIZE = 256
+_prep_order_pool: List[PrepOrder] = []
+
+def _acquire_prep_order(order_id: str, pizza_type: str, size: str, start_time: float, prep_time: int) -> PrepOrder:
+    """Get a reinitialized PrepOrder from the pool, or a new one if the pool is empty"""
+    if _prep_order_pool:
+        order = _prep_order_pool.pop()
+        order.__init__(order_id, pizza_type, size, start_time, prep_time)
+        return order
+    return PrepOrder(order_id, pizza_type, size, start_time, prep_time)
+
+def _release_prep_order(order: PrepOrder):
+    """Return a completed prep order to the pool"""
+    if len(_prep_order_pool) < _PREP_ORDER_POOL_SIZE:
+        _prep_order_pool.append(order)
 
 class PrepStation:
-    def __init__(self, station_id: str, publisher=None):
+    def __init__(self, station_id: str, publisher=None, counters=None):
         self.station_id = station_id
         self.publisher = publisher
-        self.current_orders: List[PrepOrder] = []
+        self.counters = counters
+        self.current_orders: Dict[str, PrepOrder] = {}
+        # Min-heap of (deadline, order_id) so the monitor only looks at the next order due
+        self._deadlines: List[Tuple[float, str]] = []
+        self.status_interval = 3  # seconds between status updates
+        self._status_chance = BernoulliCountdown(0.2)
         self.is_running = False
+        self._tasks: List[asyncio.Task] = []
         
         # Prep times by size (in seconds)
         self.prep_times = {
@@ -32,27 +93,31 @@ class PrepStation:
             'xlarge': 300   # 5 minutes
         }
         
-        # Ingredient inventory (starts full)
-        self.ingredients = {
-            'dough': 100,
-            'sauce': 100, 
-            'cheese': 100,
-            'pepperoni': 80,
-            'mushrooms': 60,
-            'peppers': 60,
-            'ham': 50,
-            'pineapple': 40
-        }
+        # Ingredient inventory (starts full), one slot per entry of _INGREDIENT_NAMES
+        self.inventory: List[int] = [
+            100,  # dough
+            100,  # sauce
+            100,  # cheese
+            80,   # pepperoni
+            60,   # mushrooms
+            60,   # peppers
+            50,   # ham
+            40    # pineapple
+        ]
     
     def start(self):
-        """Start the prep station monitoring"""
+        """Start the prep station monitoring tasks on the running event loop"""
         self.is_running = True
-        threading.Thread(target=self._monitor_prep, daemon=True).start()
-        threading.Thread(target=self._restock_ingredients, daemon=True).start()
+        self._tasks = [
+            asyncio.create_task(self._monitor_prep()),
+            asyncio.create_task(self._restock_ingredients())
+        ]
     
     def stop(self):
         """Stop the prep station"""
         self.is_running = False
+        for task in self._tasks:
+            task.cancel()
     
     def add_order(self, order_id: str, pizza_type: str, size: str) -> bool:
         """Add an order to prep queue"""
@@ -63,16 +128,13 @@ class PrepStation:
         # Add some randomness
         prep_time += random.randint(-20, 40)
         
-        order = PrepOrder(
-            order_id=order_id,
-            pizza_type=pizza_type,
-            size=size, 
-            start_time=datetime.now(),
-            prep_time=prep_time
-        )
+        order = _acquire_prep_order(order_id, pizza_type, size, time.monotonic(), prep_time)
         
-        self.current_orders.append(order)
+        self.current_orders[order_id] = order
+        heapq.heappush(self._deadlines, (order.deadline, order_id))
         self._use_ingredients(pizza_type)
+        if self.counters:
+            self.counters.adjust(orders_prepping=1)
         
         if self.publisher:
             self.publisher.publish_prep_event(
@@ -87,15 +149,21 @@ class PrepStation:
         
         return True
     
-    def _monitor_prep(self):
+    async def _monitor_prep(self):
         """Monitor prep station and complete orders"""
+        next_status = time.monotonic()
         while self.is_running:
-            # Check for completed prep orders
-            completed = [o for o in self.current_orders if o.is_ready]
+            # Pop every prep order whose deadline has passed
+            now = time.monotonic()
+            completed = []
+            while self._deadlines and self._deadlines[0][0] <= now:
+                _, order_id = heapq.heappop(self._deadlines)
+                completed.append(self.current_orders.pop(order_id))
+            
+            if completed and self.counters:
+                self.counters.adjust(orders_prepping=-len(completed))
             
             for order in completed:
-                self.current_orders.remove(order)
-                
                 if self.publisher:
                     self.publisher.publish_prep_event(
                         station_id=self.station_id,
@@ -103,92 +171,94 @@ class PrepStation:
                         order_id=order.order_id,
                         pizza_type=order.pizza_type,
                         size=order.size,
-                        actual_prep_time=int((datetime.now() - order.start_time).total_seconds()),
+                        actual_prep_time=int(now - order.start_time),
                         queue_length=len(self.current_orders)
                     )
+                _release_prep_order(order)
             
             # Publish status updates
-            if self.publisher and random.random() < 0.2:
-                low_ingredients = [k for k, v in self.ingredients.items() if v < 20]
-                
-                self.publisher.publish_prep_event(
-                    station_id=self.station_id,
-                    event_type="status_update",
-                    queue_length=len(self.current_orders),
-                    low_ingredients=low_ingredients,
-                    total_ingredients=sum(self.ingredients.values()),
-                    efficiency_score=self._calculate_efficiency()
-                )
+            if now >= next_status:
+                next_status = now + self.status_interval
+                if self.publisher and self._status_chance.tick():
+                    self._publish_status_update()
             
-            time.sleep(3)
+            # Sleep until the next order is due or the next status update, whichever is first
+            wake_at = next_status
+            if self._deadlines:
+                wake_at = min(wake_at, self._deadlines[0][0])
+            await asyncio.sleep(max(0.1, wake_at - time.monotonic()))
+    
+    def _publish_status_update(self):
+        """Publish queue length and ingredient levels"""
+        low_ingredients = [_INGREDIENT_NAMES[i] for i, v in enumerate(self.inventory) if v < 20]
+        
+        self.publisher.publish_prep_event(
+            station_id=self.station_id,
+            event_type="status_update",
+            queue_length=len(self.current_orders),
+            low_ingredients=low_ingredients,
+            total_ingredients=sum(self.inventory),
+            efficiency_score=self._calculate_efficiency()
+        )
     
     def _check_ingredients(self, pizza_type: str) -> bool:
         """Check if we have enough ingredients for this pizza"""
-        required = self._get_required_ingredients(pizza_type)
-        return all(self.ingredients.get(ing, 0) >= amount for ing, amount in required.items())
+        inventory = self.inventory
+        return all(inventory[slot] >= amount for slot, amount in _required_ingredients(pizza_type))
     
     def _use_ingredients(self, pizza_type: str):
         """Use ingredients for making pizza"""
-        required = self._get_required_ingredients(pizza_type)
-        for ingredient, amount in required.items():
-            self.ingredients[ingredient] = max(0, self.ingredients[ingredient] - amount)
+        inventory = self.inventory
+        for slot, amount in _required_ingredients(pizza_type):
+            inventory[slot] = max(0, inventory[slot] - amount)
     
-    def _get_required_ingredients(self, pizza_type: str) -> Dict[str, int]:
-        """Get required ingredients for pizza type"""
-        base = {'dough': 1, 'sauce': 1, 'cheese': 1}
-        
-        extras = {
-            'pepperoni': {'pepperoni': 2},
-            'supreme': {'pepperoni': 1, 'mushrooms': 1, 'peppers': 1},
-            'hawaiian': {'ham': 2, 'pineapple': 1},
-            'veggie': {'mushrooms': 2, 'peppers': 2},
-            'meat_lovers': {'pepperoni': 2, 'ham': 1}
-        }
-        
-        result = base.copy()
-        result.update(extras.get(pizza_type, {}))
-        return result
-    
-    def _restock_ingredients(self):
+    async def _restock_ingredients(self):
         """Periodically restock ingredients"""
         while self.is_running:
-            time.sleep(30)  # Restock every 30 seconds
+            await asyncio.sleep(30)  # Restock every 30 seconds
             
-            for ingredient in self.ingredients:
-                if self.ingredients[ingredient] < 50:
+            inventory = self.inventory
+            for slot, level in enumerate(inventory):
+                if level < 50:
                     restock_amount = random.randint(20, 40)
-                    self.ingredients[ingredient] += restock_amount
+                    inventory[slot] = level + restock_amount
                     
                     if self.publisher:
                         self.publisher.publish_prep_event(
                             station_id=self.station_id,
                             event_type="ingredient_restocked",
-                            ingredient=ingredient,
+                            ingredient=_INGREDIENT_NAMES[slot],
                             amount_added=restock_amount,
-                            new_total=self.ingredients[ingredient]
+                            new_total=inventory[slot]
                         )
     
+    @property
+    def ingredients(self) -> Dict[str, int]:
+        """Ingredient inventory keyed by ingredient name"""
+        return dict(zip(_INGREDIENT_NAMES, self.inventory))
+    
     def _calculate_efficiency(self) -> float:
         """Calculate prep station efficiency"""
         # Based on queue length and ingredient levels
         queue_efficiency = 1.0 if len(self.current_orders) < 3 else 0.5
-        ingredient_efficiency = min(self.ingredients.values()) / 100
+        ingredient_efficiency = min(self.inventory) / 100
         return min(1.0, (queue_efficiency + ingredient_efficiency) / 2)
     
     @property
     def status(self) -> Dict:
         """Get current prep station status"""
+        now = time.monotonic()
         return {
             'station_id': self.station_id,
             'queue_length': len(self.current_orders),
-            'ingredients': self.ingredients.copy(),
+            'ingredients': self.ingredients,
             'current_orders': [
                 {
                     'order_id': o.order_id,
                     'pizza_type': o.pizza_type,
                     'size': o.size,
-                    'time_remaining': max(0, o.prep_time - int((datetime.now() - o.start_time).total_seconds()))
-                } for o in self.current_orders
+                    'time_remaining': o.time_remaining(now)
+                } for o in self.current_orders.values()
             ],
             'efficiency': self._calculate_efficiency()
         }
\ No newline at end of file
@@ -0,0 +1,25 @@
+import math
+import random
+
+def geometric_ticks(p: float) -> int:
+    """Number of failed ticks before the next success of a trial with probability p per tick"""
+    if p >= 1:
+        return 0
+    return int(math.log(1.0 - random.random()) / math.log1p(-p))
+
+class BernoulliCountdown:
+    """Per-tick random chance that draws from the RNG once per hit instead of once per tick"""
+    
+    __slots__ = ('p', 'remaining')
+    
+    def __init__(self, p: float):
+        self.p = p
+        self.remaining = geometric_ticks(p)
+    
+    def tick(self) -> bool:
+        """Advance one tick and report whether it is a hit"""
+        if self.remaining:
+            self.remaining -= 1
+            return False
+        self.remaining = geometric_ticks(self.p)
+        return True